@@ -0,0 +1,1867 @@
+from PySide6.QtWidgets import (
+    QApplication, QMainWindow, QWidget, QToolBar, QVBoxLayout, QHBoxLayout,
+    QPushButton, QLabel, QLineEdit, QComboBox, QSpinBox, QColorDialog,
+    QFileDialog, QMenuBar, QMenu, QMessageBox, QTabWidget, QDialog,
+    QDialogButtonBox, QFormLayout, QTextEdit, QGroupBox, QCheckBox,
+    QToolButton, QSplitter, QListWidget, QListWidgetItem, QGraphicsView,
+    QGraphicsScene, QGraphicsItem, QGraphicsRectItem, QGraphicsEllipseItem,
+    QGraphicsPolygonItem, QGraphicsLineItem, QGraphicsTextItem, QGraphicsPixmapItem,
+    QGraphicsProxyWidget, QFrame, QScrollArea, QDockWidget, QToolTip
+)
+from PySide6.QtGui import (
+    QPainter, QPen, QColor, QAction, QCursor, QPolygonF, QFont, QPixmap,
+    QImage, QBrush, QPainterPath, QIcon, QKeySequence, QTextCharFormat,
+    QTextCursor, QTextBlockFormat, QTextOption
+)
+from PySide6.QtCore import (
+    Qt, QPointF, QRectF, QSizeF, QLineF, QPropertyAnimation, QEasingCurve,
+    QTimer, QPoint, QSize, QParallelAnimationGroup, QVariantAnimation
+)
+from math import sin, cos, pi, atan2, sqrt
+import base64
+import numpy as np
+import sys
+import json
+import os
+
+try:
+    # Необязательный ускоритель сериализации: пишет байты в C
+    import orjson
+except ImportError:
+    orjson = None
+from enum import Enum
+from functools import lru_cache
+from operator import attrgetter
+from typing import List, Dict, Optional, Tuple, Any
+
+
+class ElementType(Enum):
+    """Типы элементов на холсте"""
+    POINT = "point"
+    LINE = "line"
+    STRAIGHT = "straight"
+    TRIANGLE = "triangle"
+    RECT = "rect"
+    CIRCLE = "circle"
+    PENTAGON = "pentagon"
+    HEXAGON = "hexagon"
+    ARROW = "arrow"
+    TEXT = "text"
+    IMAGE = "image"
+    LINK = "link"
+
+
+class AlignmentType(Enum):
+    """Типы выравнивания"""
+    LEFT = "left"
+    RIGHT = "right"
+    TOP = "top"
+    BOTTOM = "bottom"
+    CENTER_H = "center_h"
+    CENTER_V = "center_v"
+    CENTER = "center"
+    DISTRIBUTE_H = "distribute_h"
+    DISTRIBUTE_V = "distribute_v"
+
+
+class CanvasElement:
+    """Базовый класс для элементов на холсте"""
+
+    def __init__(self, element_type: ElementType, position: QPointF):
+        self.element_type = element_type
+        self._position = position
+        self._size = QSizeF(100, 100)
+        self.selected = False
+        self.color = QColor(150, 0, 150)
+        self.z_value = 0
+        self.data = {}  # Дополнительные данные элемента
+        # Кэши готовой геометрии (не сериализуются)
+        self._cached_polygon: Optional[QPolygonF] = None
+        self._polygon_key = None
+        self._cached_pixmap: Optional[QPixmap] = None
+        self._pixmap_key = None
+        # Результат проверки существования файла изображения
+        self._path_checked: Optional[str] = None
+        self._path_valid = False
+        self._bounds: Optional[QRectF] = None
+        # Скалярные границы для быстрой проверки попадания без QRectF
+        self._x = self._y = self._x2 = self._y2 = 0.0
+        # Холст-владелец; выставляется в add_element
+        self._canvas: Optional['Canvas'] = None
+
+    @property
+    def position(self) -> QPointF:
+        return self._position
+
+    @position.setter
+    def position(self, value: QPointF):
+        self._position = value
+        self._bounds = None
+
+    @property
+    def size(self) -> QSizeF:
+        return self._size
+
+    @size.setter
+    def size(self, value: QSizeF):
+        self._size = value
+        self._bounds = None
+
+    def get_bounds(self) -> QRectF:
+        """Возвращает границы элемента (кэшируются до смены геометрии)
+
+        Границы покрывают реально рисуемую геометрию: круг центрирован
+        в position с радиусом size.width(), прямая и стрелка тянутся от
+        position к data['end'] (у стрелки — запас на наконечник).
+        """
+        if self._bounds is None:
+            et = self.element_type
+            if et == ElementType.CIRCLE:
+                radius = self._size.width()
+                self._bounds = QRectF(self._position.x() - radius,
+                                      self._position.y() - radius,
+                                      radius * 2, radius * 2)
+            elif et in (ElementType.STRAIGHT, ElementType.ARROW):
+                end = self.data.get('end', self._position)
+                end_point = QPointF(end[0], end[1]) if isinstance(end, tuple) else end
+                bounds = QRectF(self._position, end_point).normalized()
+                if et == ElementType.ARROW:
+                    # Крылья наконечника (длина 30 в arrow_head) могут
+                    # выступать за отрезок в любую сторону
+                    bounds = bounds.adjusted(-30, -30, 30, 30)
+                self._bounds = bounds
+            else:
+                self._bounds = QRectF(self._position, self._size)
+            self._x = self._bounds.left()
+            self._y = self._bounds.top()
+            self._x2 = self._bounds.right()
+            self._y2 = self._bounds.bottom()
+        return self._bounds
+
+    def contains_point(self, point: QPointF) -> bool:
+        """Проверяет, содержит ли элемент точку"""
+        if self._bounds is None:
+            self.get_bounds()
+        # Четыре сравнения со скалярами вместо вызова QRectF.contains
+        return self._x <= point.x() <= self._x2 and self._y <= point.y() <= self._y2
+
+    def intersects_rect(self, rx: float, ry: float, rx2: float, ry2: float) -> bool:
+        """Пересекаются ли границы элемента с прямоугольником (скалярный AABB-тест)"""
+        if self._bounds is None:
+            self.get_bounds()
+        return self._x < rx2 and rx < self._x2 and self._y < ry2 and ry < self._y2
+
+    def move(self, delta: QPointF):
+        """Перемещает элемент"""
+        self._position += delta
+        if self.element_type in (ElementType.STRAIGHT, ElementType.ARROW):
+            # Конец отрезка не привязан к position — сдвиг меняет форму,
+            # границы пересчитываются заново
+            self._bounds = None
+        elif self._bounds is not None:
+            # Сдвиг дешевле, чем пересоздание прямоугольника
+            self._bounds.translate(delta)
+            dx, dy = delta.x(), delta.y()
+            self._x += dx
+            self._x2 += dx
+            self._y += dy
+            self._y2 += dy
+        if self._canvas is not None:
+            self._canvas._mark_dirty()
+
+    def set_size(self, size: QSizeF):
+        """Устанавливает размер элемента"""
+        self.size = size
+        if self._canvas is not None:
+            self._canvas._mark_dirty()
+
+    def to_dict(self) -> Dict:
+        """Сериализация элемента"""
+        data = self.data
+        if 'points' in data:
+            # Точки кривой пакуются в base64-буфер float32: ~8 байт на
+            # точку вместо ~30 в JSON-списке пар
+            data = {k: v for k, v in data.items() if k != 'points'}
+            pts = np.asarray(self.data['points'], dtype=np.float32)
+            data['points_f32'] = base64.b64encode(pts.tobytes()).decode('ascii')
+        end = data.get('end')
+        if isinstance(end, QPointF):
+            # Живой QPointF конца линии/стрелки не сериализуется в JSON;
+            # код отрисовки и from_dict принимают и кортеж
+            if data is self.data:
+                data = dict(data)
+            data['end'] = (end.x(), end.y())
+        return {
+            'type': self.element_type.value,
+            'position': (self.position.x(), self.position.y()),
+            'size': (self.size.width(), self.size.height()),
+            # Упакованный ARGB-int: дешевле в JSON, чем строка '#rrggbb'
+            'color': self.color.rgba(),
+            'z_value': self.z_value,
+            'data': data
+        }
+
+    @staticmethod
+    def from_dict(data: Dict) -> 'CanvasElement':
+        """Десериализация элемента"""
+        element = CanvasElement(
+            ElementType(data['type']),
+            QPointF(data['position'][0], data['position'][1])
+        )
+        element.size = QSizeF(data['size'][0], data['size'][1])
+        color = data['color']
+        # Старые проекты хранят цвет строкой '#rrggbb'
+        element.color = QColor.fromRgba(color) if isinstance(color, int) else QColor(color)
+        element.z_value = data.get('z_value', 0)
+        element.data = data.get('data', {})
+        if 'points_f32' in element.data:
+            raw = base64.b64decode(element.data.pop('points_f32'))
+            element.data['points'] = np.frombuffer(raw, dtype=np.float32).reshape(-1, 2).tolist()
+        end = element.data.get('end')
+        if isinstance(end, list):
+            # Из JSON конец приходит списком, отрисовка ждёт кортеж
+            element.data['end'] = tuple(end)
+        return element
+
+
+# Поворот единичного вектора направления на угол крыльев наконечника
+# стрелки (±(pi - pi/6)), посчитанный один раз
+_ARROW_COS = cos(pi - pi / 6)
+_ARROW_SIN = sin(pi - pi / 6)
+
+# Единичные вершины правильных многоугольников, посчитанные один раз при
+# импорте: в горячем пути остаётся только умножение на радиус и сдвиг
+_UNIT_POLY = {
+    n: np.array([(cos(2 * pi * i / n - pi / 2), sin(2 * pi * i / n - pi / 2))
+                 for i in range(n)], dtype=np.float64)
+    for n in (3, 5, 6)
+}
+
+
+@lru_cache(maxsize=256)
+def _scaled_polygon_offsets(sides: int, radius: float) -> Tuple[Tuple[float, float], ...]:
+    """Вершины правильного многоугольника относительно центра
+
+    Кэшируется по (стороны, радиус): при растягивании фигуры радиус
+    часто повторяется от кадра к кадру, и вся геометрия берётся готовой.
+    """
+    unit = _UNIT_POLY.get(sides)
+    if unit is None:
+        return tuple((radius * cos(2 * pi * i / sides - pi / 2),
+                      radius * sin(2 * pi * i / sides - pi / 2))
+                     for i in range(sides))
+    return tuple(map(tuple, unit * radius))
+
+
+@lru_cache(maxsize=256)
+def _pen(rgba: int, width: int = 1, style: Qt.PenStyle = Qt.SolidLine) -> QPen:
+    """Перо по упакованному ARGB-цвету; кэшированные перья нельзя мутировать"""
+    return QPen(QColor.fromRgba(rgba), width, style)
+
+
+@lru_cache(maxsize=64)
+def _brush(rgba: int) -> QBrush:
+    """Кисть по упакованному ARGB-цвету"""
+    return QBrush(QColor.fromRgba(rgba))
+
+
+@lru_cache(maxsize=64)
+def _font(family: str, size: int) -> QFont:
+    """Шрифт по семейству и кеглю"""
+    return QFont(family, size)
+
+
+@lru_cache(maxsize=32)
+def _load_pixmap(image_path: str, mtime: float) -> QPixmap:
+    """Исходный pixmap по пути к файлу
+
+    mtime входит в ключ: при изменении файла на диске кэш
+    автоматически промахивается и картинка перечитывается.
+    """
+    return QPixmap(image_path)
+
+
+# Упакованные ARGB-цвета интерфейса — ключи для кэшей пера и кисти
+_COLOR_FRAME = QColor(200, 200, 200).rgba()
+_COLOR_ACCENT = QColor(0, 120, 215).rgba()
+_COLOR_ACCENT_FILL = QColor(0, 120, 215, 50).rgba()
+_COLOR_MARQUEE_FILL = QColor(0, 120, 215, 30).rgba()
+_COLOR_WHITE = QColor(255, 255, 255).rgba()
+_COLOR_DEFAULT = QColor(150, 0, 150).rgba()
+
+
+def _simplify_stroke(pts: np.ndarray, eps: float = 1.0) -> np.ndarray:
+    """Прореживает кривую алгоритмом Рамера-Дугласа-Пекера
+
+    Сырые события мыши дают сотни почти совпадающих точек; после
+    прореживания каждая последующая перерисовка обходит в разы меньше
+    сегментов. Расстояния до хорды считаются векторно по всему участку.
+    """
+    n = len(pts)
+    if n < 3:
+        return pts
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        i0, i1 = stack.pop()
+        if i1 - i0 < 2:
+            continue
+        seg = pts[i0 + 1:i1]
+        dx = float(pts[i1, 0] - pts[i0, 0])
+        dy = float(pts[i1, 1] - pts[i0, 1])
+        length = sqrt(dx * dx + dy * dy)
+        if length == 0.0:
+            dist = np.hypot(seg[:, 0] - pts[i0, 0], seg[:, 1] - pts[i0, 1])
+        else:
+            dist = np.abs((seg[:, 0] - pts[i0, 0]) * dy - (seg[:, 1] - pts[i0, 1]) * dx) / length
+        idx = int(np.argmax(dist))
+        if dist[idx] > eps:
+            mid = i0 + 1 + idx
+            keep[mid] = True
+            stack.append((i0, mid))
+            stack.append((mid, i1))
+    return pts[keep]
+
+
+class Canvas(QWidget):
+    """Холст для рисования"""
+
+    # Размер ячейки сеточного индекса в пикселях
+    _GRID_CELL = 256
+
+    # Инструменты, создающие фигуру растягиванием мыши
+    _DRAG_TOOLS = {
+        "straight": ElementType.STRAIGHT,
+        "arrow": ElementType.ARROW,
+        "triangle": ElementType.TRIANGLE,
+        "rect": ElementType.RECT,
+        "circle": ElementType.CIRCLE,
+        "pentagon": ElementType.PENTAGON,
+        "hexagon": ElementType.HEXAGON,
+    }
+
+    # Инструменты, создающие элемент сразу по клику:
+    # тип, шаблон data и размер (None — размер по умолчанию)
+    _IMMEDIATE_TOOLS = {
+        "point": (ElementType.POINT, {'radius': 5}, QSizeF(5, 5)),
+        "text": (ElementType.TEXT, {
+            'text': 'Текст',
+            'font_family': 'Arial',
+            'font_size': 12,
+            'alignment': Qt.AlignLeft,
+            'color': QColor(0, 0, 0).name()
+        }, None),
+    }
+
+    # Тексты подсказок по типам элементов
+    _TOOLTIP_TEXT = {
+        ElementType.POINT: "Точка - базовый элемент",
+        ElementType.LINE: "Кривая линия - рисуется от руки",
+        ElementType.STRAIGHT: "Прямая линия - соединяет две точки",
+        ElementType.TRIANGLE: "Треугольник - правильный треугольник",
+        ElementType.RECT: "Прямоугольник - можно изменять размер",
+        ElementType.CIRCLE: "Круг - можно изменять размер",
+        ElementType.PENTAGON: "Пятиугольник - правильный многоугольник",
+        ElementType.HEXAGON: "Шестиугольник - правильный многоугольник",
+        ElementType.ARROW: "Стрелка - указывает направление",
+        ElementType.TEXT: "Текст - двойной клик для редактирования",
+        ElementType.IMAGE: "Изображение - внешний файл",
+        ElementType.LINK: "Ссылка - переход на другой холст"
+    }
+
+    def __init__(self, canvas_id: str, get_tool_callback, parent=None):
+        super().__init__(parent)
+        self.canvas_id = canvas_id
+        self.get_tool = get_tool_callback
+
+        # Элементы на холсте
+        self.elements: List[CanvasElement] = []
+        self.selected_elements: List[CanvasElement] = []
+
+        # Сеточный индекс для поиска элементов по координатам:
+        # ячейка -> элементы, чьи границы её пересекают (в порядке добавления).
+        # Перестраивается лениво при первом запросе после изменений
+        self._grid_cells: Dict[Tuple[int, int], List[CanvasElement]] = {}
+        self._index_dirty = True
+        # Кэш попаданий по целочисленному пикселю (сбрасывается в _mark_dirty)
+        self._hit_cache: Dict[Tuple[int, int], Optional[CanvasElement]] = {}
+        # Пока True, уведомления от элементов не планируют перерисовку —
+        # пакетные изменения завершаются одним _mark_dirty
+        self._batch_updating = False
+
+        # Состояние рисования
+        self.drawing = False
+        self.current_element: Optional[CanvasElement] = None
+        self.start_point: Optional[QPointF] = None
+        # Текущая кривая: предвыделенный буфер координат (x, y)
+        # вместо списка QPointF — меньше памяти и один вызов отрисовки
+        self._stroke_xy = np.empty((1024, 2), dtype=np.float32)
+        self._stroke_n = 0
+
+        # Состояние выделения
+        self.selection_start: Optional[QPointF] = None
+        self.selection_rect: Optional[QRectF] = None
+        self.dragging = False
+        self.drag_start: Optional[QPointF] = None
+        self.resize_handle: Optional[int] = None
+        # Область предыдущего кадра превью — для точечной перерисовки
+        self._last_preview_rect: Optional[QRectF] = None
+        # Кэш зафиксированной сцены: фон, сетка и готовые элементы.
+        # ARGB32_Premultiplied — самый быстрый формат для блита растром
+        self._scene_cache: Optional[QImage] = None
+        # Сцена без перетаскиваемых элементов (живёт на время перетаскивания)
+        self._static_cache: Optional[QImage] = None
+        # Фон с сеткой, пересобирается при смене размера холста или экрана
+        self._grid_pixmap: Optional[QPixmap] = None
+        self._grid_key: Optional[Tuple[int, int, float]] = None
+        # Элементы, отсортированные по z (сбрасывается в _mark_dirty)
+        self._sorted_cache: Optional[List[CanvasElement]] = None
+        # Геометрия превью растягиваемой фигуры одним QPainterPath
+        self._preview_path = QPainterPath()
+        # Текущая кривая как инкрементально наращиваемый путь:
+        # кадр превью не перебирает весь буфер точек заново
+        self._stroke_path = QPainterPath()
+
+        # Таблица обновления растягиваемой фигуры: инструмент -> обработчик
+        self._resize_handlers = {
+            "straight": self._resize_line,
+            "arrow": self._resize_line,
+            "rect": self._resize_rect,
+            "circle": self._resize_uniform,
+            "triangle": self._resize_uniform,
+            "pentagon": self._resize_uniform,
+            "hexagon": self._resize_uniform,
+        }
+
+        # Настройки
+        self.setMinimumSize(800, 600)
+        self.setMouseTracking(True)
+        self.setFocusPolicy(Qt.StrongFocus)
+        # paintEvent всегда закрашивает всю область (фон-пиксмап или кэш),
+        # поэтому Qt может не очищать виджет перед перерисовкой
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+        # Подсказки
+        self.tooltip_timer = QTimer()
+        self.tooltip_timer.setSingleShot(True)
+        self.tooltip_timer.timeout.connect(self.show_tooltip)
+        self.tooltip_element = None
+        self._last_tooltip_pos: Optional[QPointF] = None
+        self._main_window: Optional[QMainWindow] = None
+
+    def _mark_dirty(self, rect: Optional[QRectF] = None):
+        """Сбрасывает кэши сцены и индекса, планирует перерисовку.
+
+        Если известна изменившаяся область, перерисовывается только она.
+        """
+        if self._batch_updating:
+            return
+        self._scene_cache = None
+        if not self.dragging:
+            # Во время перетаскивания меняются только исключённые из
+            # статичного кэша элементы — сам кэш остаётся актуальным
+            self._static_cache = None
+        self._index_dirty = True
+        self._sorted_cache = None
+        self._hit_cache.clear()
+        if rect is None:
+            self.update()
+        else:
+            # Запас на маркеры выделения и толщину пера
+            self.update(rect.adjusted(-10, -10, 10, 10).toRect())
+
+    def _rebuild_index(self):
+        """Перестраивает сеточный индекс по текущим границам элементов"""
+        cell = self._GRID_CELL
+        cells: Dict[Tuple[int, int], List[CanvasElement]] = {}
+        for element in self.elements:
+            bounds = element.get_bounds()
+            x0 = int(bounds.left() // cell)
+            x1 = int(bounds.right() // cell)
+            y0 = int(bounds.top() // cell)
+            y1 = int(bounds.bottom() // cell)
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    cells.setdefault((cx, cy), []).append(element)
+        self._grid_cells = cells
+        self._index_dirty = False
+
+    def add_element(self, element: CanvasElement):
+        """Добавляет элемент на холст"""
+        self.elements.append(element)
+        element._canvas = self
+        self._mark_dirty()
+
+    def remove_element(self, element: CanvasElement):
+        """Удаляет элемент с холста"""
+        if element in self.elements:
+            self.elements.remove(element)
+            element._canvas = None
+        if element in self.selected_elements:
+            self.selected_elements.remove(element)
+        self._mark_dirty()
+
+    def select_element(self, element: CanvasElement, add_to_selection=False):
+        """Выделяет элемент"""
+        if not add_to_selection:
+            self.clear_selection()
+        if element not in self.selected_elements:
+            self.selected_elements.append(element)
+            element.selected = True
+        self.update()
+
+    def clear_selection(self):
+        """Снимает выделение со всех элементов"""
+        for element in self.selected_elements:
+            element.selected = False
+        self.selected_elements.clear()
+        self.update()
+
+    def get_element_at(self, point: QPointF) -> Optional[CanvasElement]:
+        """Возвращает элемент в указанной точке"""
+        # Повторные запросы по тому же пикселю (подсказки, клики)
+        # отвечаются из кэша, пока сцена не изменилась
+        pixel = (int(point.x()), int(point.y()))
+        if pixel in self._hit_cache:
+            return self._hit_cache[pixel]
+        if self._index_dirty:
+            self._rebuild_index()
+        key = (pixel[0] // self._GRID_CELL, pixel[1] // self._GRID_CELL)
+        # Проверяем только кандидатов из ячейки, в обратном порядке (сверху вниз)
+        found = None
+        for element in reversed(self._grid_cells.get(key, ())):
+            if element.contains_point(point):
+                found = element
+                break
+        if len(self._hit_cache) > 64:
+            self._hit_cache.clear()
+        self._hit_cache[pixel] = found
+        return found
+
+    def get_elements_in_rect(self, rect: QRectF) -> List[CanvasElement]:
+        """Возвращает все элементы в прямоугольнике"""
+        if self._index_dirty:
+            self._rebuild_index()
+        cell = self._GRID_CELL
+        rx, ry, rx2, ry2 = rect.left(), rect.top(), rect.right(), rect.bottom()
+        x0 = int(rx // cell)
+        x1 = int(rx2 // cell)
+        y0 = int(ry // cell)
+        y1 = int(ry2 // cell)
+        result = []
+        seen = set()
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                for element in self._grid_cells.get((cx, cy), ()):
+                    if id(element) not in seen and element.intersects_rect(rx, ry, rx2, ry2):
+                        seen.add(id(element))
+                        result.append(element)
+        return result
+
+    def _stroke_append(self, pos: QPointF):
+        """Добавляет точку текущей кривой в буфер, удваивая его при заполнении"""
+        if self._stroke_n == len(self._stroke_xy):
+            self._stroke_xy = np.resize(self._stroke_xy, (len(self._stroke_xy) * 2, 2))
+        self._stroke_xy[self._stroke_n] = (pos.x(), pos.y())
+        self._stroke_n += 1
+
+    def regular_polygon(self, center: QPointF, size: float, sides: int) -> List[QPointF]:
+        """Создает правильный многоугольник"""
+        cx, cy = center.x(), center.y()
+        return [QPointF(cx + x, cy + y) for x, y in _scaled_polygon_offsets(sides, size / 2)]
+
+    def arrow_head(self, start: QPointF, end: QPointF, size: float = 30) -> Tuple[QPointF, QPointF]:
+        """Создает наконечник стрелки"""
+        dx = end.x() - start.x()
+        dy = end.y() - start.y()
+        length = sqrt(dx * dx + dy * dy) or 1.0
+        ux, uy = dx / length, dy / length
+
+        # Вместо atan2 + четырёх cos/sin — поворот единичного вектора
+        # постоянной матрицей на ±(pi - pi/6)
+        p1 = QPointF(end.x() + size * (ux * _ARROW_COS - uy * _ARROW_SIN),
+                     end.y() + size * (ux * _ARROW_SIN + uy * _ARROW_COS))
+        p2 = QPointF(end.x() + size * (ux * _ARROW_COS + uy * _ARROW_SIN),
+                     end.y() + size * (uy * _ARROW_COS - ux * _ARROW_SIN))
+        return p1, p2
+
+    def get_resize_handle(self, point: QPointF, bounds: QRectF) -> Optional[int]:
+        """Определяет, какой маркер изменения размера находится в точке"""
+        handles = [
+            QPointF(bounds.left(), bounds.top()),  # 0: верхний левый
+            QPointF(bounds.center().x(), bounds.top()),  # 1: верхний центр
+            QPointF(bounds.right(), bounds.top()),  # 2: верхний правый
+            QPointF(bounds.right(), bounds.center().y()),  # 3: правый центр
+            QPointF(bounds.right(), bounds.bottom()),  # 4: нижний правый
+            QPointF(bounds.center().x(), bounds.bottom()),  # 5: нижний центр
+            QPointF(bounds.left(), bounds.bottom()),  # 6: нижний левый
+            QPointF(bounds.left(), bounds.center().y())  # 7: левый центр
+        ]
+
+        handle_size = 8
+        for i, handle in enumerate(handles):
+            if (point - handle).manhattanLength() < handle_size:
+                return i
+        return None
+
+    def _get_main_window(self) -> Optional[QMainWindow]:
+        """Возвращает главное окно, кэшируя результат обхода parent chain"""
+        if self._main_window is None:
+            parent = self.parent()
+            while parent and not isinstance(parent, QMainWindow):
+                parent = parent.parent()
+            self._main_window = parent
+        return self._main_window
+
+    def mousePressEvent(self, event):
+        pos = event.position()
+        tool = self.get_tool()
+
+        if event.button() == Qt.LeftButton:
+            # Элемент под курсором ищется один раз на всё событие
+            element = self.get_element_at(pos)
+
+            # Проверка клика по ссылке (вне зависимости от инструмента)
+            if element and element.element_type == ElementType.LINK:
+                target_canvas_id = element.data.get('target_canvas')
+                animate = element.data.get('animate', True)
+                if target_canvas_id:
+                    main_window = self._get_main_window()
+                    if main_window and hasattr(main_window, 'navigate_to_canvas'):
+                        main_window.navigate_to_canvas(target_canvas_id, animate)
+                return
+
+            if tool == "select":
+                # Режим выделения
+                if element:
+                    self.select_element(element, event.modifiers() & Qt.ControlModifier)
+                    self.dragging = True
+                    self.drag_start = pos
+                else:
+                    self.clear_selection()
+                    self.selection_start = pos
+                    self.selection_rect = QRectF(pos, QSizeF(0, 0))
+            else:
+                # Режим рисования
+                self.start_point = pos
+                self.drawing = True
+                self._stroke_n = 0
+                self._stroke_append(pos)
+
+                if tool == "line":
+                    # Кривая линия - начинаем сбор точек
+                    self._stroke_path = QPainterPath(pos)
+                elif tool in self._DRAG_TOOLS:
+                    # Фигуры, растягиваемые мышью: одна ветка вместо цепочки elif
+                    element = CanvasElement(self._DRAG_TOOLS[tool], pos)
+                    element.data = {'end': pos}
+                    self.current_element = element
+                elif tool in self._IMMEDIATE_TOOLS:
+                    # Элементы, создаваемые одним кликом
+                    element_type, data, size = self._IMMEDIATE_TOOLS[tool]
+                    element = CanvasElement(element_type, pos)
+                    element.data = dict(data)
+                    if size is not None:
+                        element.size = QSizeF(size)
+                    self.add_element(element)
+                    self.drawing = False
+                # image и link создаются через диалоги главного окна
+
+        if event.button() == Qt.RightButton:
+            # Контекстное меню
+            element = self.get_element_at(pos)
+            if element:
+                self.show_context_menu(element, event.globalPos())
+
+    def mouseMoveEvent(self, event):
+        pos = event.position()
+        tool = self.get_tool()
+
+        # Подсказки: поиск элемента не нужен во время операций с мышью,
+        # а при дрожании курсора на месте (< 4px) переиспользуем результат
+        if not self.drawing and not self.dragging and self.selection_start is None:
+            if (self._last_tooltip_pos is None
+                    or (pos - self._last_tooltip_pos).manhattanLength() >= 4):
+                self._last_tooltip_pos = pos
+                element = self.get_element_at(pos)
+                if element != self.tooltip_element:
+                    self.tooltip_timer.stop()
+                    self.tooltip_element = element
+                    if element:
+                        self.tooltip_timer.start(500)  # Показать через 500мс
+
+        if tool == "select" and self.dragging and self.drag_start and self.selected_elements:
+            # Перемещение выделенных элементов: уведомления глушатся,
+            # перерисовка планируется один раз на событие
+            delta = pos - self.drag_start
+            if delta.isNull():
+                return
+            # Перерисовка только объединения старых и новых границ
+            dirty = QRectF()
+            self._batch_updating = True
+            for element in self.selected_elements:
+                dirty = dirty.united(element.get_bounds())
+                element.move(delta)
+                dirty = dirty.united(element.get_bounds())
+            self._batch_updating = False
+            self.drag_start = pos
+            self._mark_dirty(dirty)
+        elif tool == "select" and self.selection_start:
+            # Рисование прямоугольника выделения
+            rect = QRectF(self.selection_start, pos).normalized()
+            if rect == self.selection_rect:
+                return
+            old_rect = self.selection_rect
+            self.selection_rect = rect
+            dirty = rect if old_rect is None else rect.united(old_rect)
+            self.update(dirty.adjusted(-2, -2, 2, 2).toRect())
+        elif self.drawing:
+            if tool == "line":
+                # Кривая линия: перерисовываем только новый сегмент
+                if self._stroke_n:
+                    prev = QPointF(float(self._stroke_xy[self._stroke_n - 1, 0]),
+                                   float(self._stroke_xy[self._stroke_n - 1, 1]))
+                else:
+                    prev = pos
+                self._stroke_append(pos)
+                self._stroke_path.lineTo(pos)
+                dirty = QRectF(prev, pos).normalized().adjusted(-4, -4, 4, 4)
+                self.update(dirty.toRect())
+            elif self.current_element:
+                # Обновление размера элемента
+                self.current_element.data['end'] = pos
+                handler = self._resize_handlers.get(tool)
+                if handler:
+                    handler(pos)
+                self._update_preview_path()
+
+                # Инвалидируем объединение старой и новой области превью,
+                # а не весь холст (запас покрывает круг и наконечник стрелки)
+                new_rect = QRectF(self.start_point, pos).normalized()
+                margin = max(new_rect.width(), new_rect.height()) + 40
+                new_rect = new_rect.adjusted(-margin, -margin, margin, margin)
+                dirty = new_rect if self._last_preview_rect is None else new_rect.united(self._last_preview_rect)
+                self._last_preview_rect = new_rect
+                self.update(dirty.toRect())
+
+    def _resize_line(self, end: QPointF):
+        """Обновляет длину прямой линии или стрелки"""
+        dx = end.x() - self.start_point.x()
+        dy = end.y() - self.start_point.y()
+        self.current_element.size = QSizeF(sqrt(dx * dx + dy * dy), 1)
+
+    def _resize_rect(self, end: QPointF):
+        """Обновляет положение и размер прямоугольника"""
+        x = min(self.start_point.x(), end.x())
+        y = min(self.start_point.y(), end.y())
+        w = abs(end.x() - self.start_point.x())
+        h = abs(end.y() - self.start_point.y())
+        self.current_element.position = QPointF(x, y)
+        self.current_element.size = QSizeF(w, h)
+
+    def _resize_uniform(self, end: QPointF):
+        """Обновляет размер фигур с равными сторонами"""
+        size = min(abs(end.x() - self.start_point.x()), abs(end.y() - self.start_point.y()))
+        self.current_element.size = QSizeF(size, size)
+
+    def mouseDoubleClickEvent(self, event):
+        """Обработка двойного клика для редактирования элементов"""
+        if event.button() == Qt.LeftButton:
+            pos = event.position()
+            element = self.get_element_at(pos)
+            if element:
+                self.edit_element(element)
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            tool = self.get_tool()
+
+            if tool == "select" and self.selection_start:
+                # Завершение выделения
+                if self.selection_rect:
+                    elements = self.get_elements_in_rect(self.selection_rect)
+                    for element in elements:
+                        self.select_element(element, True)
+                self.selection_start = None
+                self.selection_rect = None
+                self.update()
+            elif tool == "select":
+                self.dragging = False
+                self.drag_start = None
+                self._static_cache = None
+                # Последний кадр перетаскивания рисовал выделенные элементы
+                # поверх остальных — перерисовываем с настоящим z-порядком
+                self.update()
+            elif self.drawing:
+                if tool == "line" and self._stroke_n > 1:
+                    # Сохранение кривой линии (с прореживанием лишних точек)
+                    pts = _simplify_stroke(self._stroke_xy[:self._stroke_n])
+                    element = CanvasElement(ElementType.LINE, QPointF(float(pts[0, 0]), float(pts[0, 1])))
+                    # tolist() конвертирует весь буфер на стороне C,
+                    # без питоновского цикла по точкам
+                    element.data = {'points': pts.tolist()}
+                    # Вычисляем размеры: по одному проходу на минимумы и максимумы
+                    xmin, ymin = pts.min(axis=0)
+                    xmax, ymax = pts.max(axis=0)
+                    element.position = QPointF(float(xmin), float(ymin))
+                    element.size = QSizeF(float(xmax - xmin), float(ymax - ymin))
+                    self.add_element(element)
+                elif self.current_element:
+                    # Сохранение элемента
+                    self.add_element(self.current_element)
+
+                self._reset_draw_state()
+                self.update()
+
+    def _reset_draw_state(self):
+        """Сбрасывает всё состояние рисования в одном месте"""
+        self.drawing = False
+        self.current_element = None
+        self.start_point = None
+        self._stroke_n = 0
+        self._last_preview_rect = None
+        self._preview_path = QPainterPath()
+        self._stroke_path = QPainterPath()
+
+    def show_tooltip(self):
+        """Показывает подсказку для элемента"""
+        if self.tooltip_element:
+            tooltip_text = self.get_tooltip_text(self.tooltip_element)
+            if tooltip_text:
+                QToolTip.showText(QCursor.pos(), tooltip_text, self)
+
+    def get_tooltip_text(self, element: CanvasElement) -> str:
+        """Возвращает текст подсказки для элемента"""
+        return self._TOOLTIP_TEXT.get(element.element_type, "Элемент")
+
+    def show_context_menu(self, element: CanvasElement, global_pos: QPoint):
+        """Показывает контекстное меню для элемента"""
+        menu = QMenu(self)
+
+        edit_action = menu.addAction("Редактировать")
+        delete_action = menu.addAction("Удалить")
+        menu.addSeparator()
+        align_action = menu.addAction("Выровнять...")
+        link_action = menu.addAction("Создать ссылку...")
+
+        action = menu.exec(global_pos)
+        if action == delete_action:
+            self.remove_element(element)
+        elif action == edit_action:
+            self.edit_element(element)
+        elif action == align_action:
+            self.show_alignment_dialog()
+        elif action == link_action:
+            # Выделяем элемент и создаем ссылку
+            self.select_element(element)
+            # Сигнализируем главному окну о необходимости создать ссылку
+            main_window = self._get_main_window()
+            if main_window and hasattr(main_window, 'create_link_for_element'):
+                main_window.create_link_for_element(element)
+
+    def edit_element(self, element: CanvasElement):
+        """Редактирует элемент"""
+        if element.element_type == ElementType.TEXT:
+            dialog = QDialog(self)
+            dialog.setWindowTitle("Редактирование текста")
+            layout = QVBoxLayout(dialog)
+
+            text_edit = QTextEdit()
+            text_edit.setPlainText(element.data.get('text', ''))
+            layout.addWidget(QLabel("Текст:"))
+            layout.addWidget(text_edit)
+
+            # Настройки шрифта
+            font_family = QComboBox()
+            font_family.addItems(['Arial', 'Times New Roman', 'Courier New', 'Verdana'])
+            font_family.setCurrentText(element.data.get('font_family', 'Arial'))
+            layout.addWidget(QLabel("Шрифт:"))
+            layout.addWidget(font_family)
+
+            font_size = QSpinBox()
+            font_size.setRange(8, 72)
+            font_size.setValue(element.data.get('font_size', 12))
+            layout.addWidget(QLabel("Размер:"))
+            layout.addWidget(font_size)
+
+            # Выравнивание
+            alignment = QComboBox()
+            alignment.addItems(['Слева', 'По центру', 'Справа'])
+            current_align = element.data.get('alignment', Qt.AlignLeft)
+            if current_align == Qt.AlignCenter:
+                alignment.setCurrentIndex(1)
+            elif current_align == Qt.AlignRight:
+                alignment.setCurrentIndex(2)
+            layout.addWidget(QLabel("Выравнивание:"))
+            layout.addWidget(alignment)
+
+            # Цвет
+            color_btn = QPushButton("Выбрать цвет")
+            color_btn.clicked.connect(lambda: self.choose_color(element))
+            layout.addWidget(color_btn)
+
+            buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+            buttons.accepted.connect(dialog.accept)
+            buttons.rejected.connect(dialog.reject)
+            layout.addWidget(buttons)
+
+            if dialog.exec():
+                element.data['text'] = text_edit.toPlainText()
+                element.data['font_family'] = font_family.currentText()
+                element.data['font_size'] = font_size.value()
+                align_map = {0: Qt.AlignLeft, 1: Qt.AlignCenter, 2: Qt.AlignRight}
+                element.data['alignment'] = align_map[alignment.currentIndex()]
+                self._mark_dirty()
+
+    def choose_color(self, element: CanvasElement):
+        """Выбор цвета для элемента"""
+        color = QColorDialog.getColor(element.color, self)
+        if color.isValid():
+            element.color = color
+            if element.element_type == ElementType.TEXT:
+                element.data['color'] = color.name()
+            self._mark_dirty()
+
+    def show_alignment_dialog(self):
+        """Показывает диалог выравнивания"""
+        if not self.selected_elements:
+            QMessageBox.information(self, "Информация", "Выберите элементы для выравнивания")
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Выравнивание элементов")
+        layout = QVBoxLayout(dialog)
+
+        layout.addWidget(QLabel("Выберите тип выравнивания:"))
+
+        align_buttons = QGroupBox("Выравнивание")
+        align_layout = QVBoxLayout(align_buttons)
+
+        align_type = None
+
+        def create_align_button(text, align):
+            btn = QPushButton(text)
+            btn.clicked.connect(lambda: setattr(dialog, 'align_result', align) or dialog.accept())
+            align_layout.addWidget(btn)
+
+        create_align_button("По левому краю", AlignmentType.LEFT)
+        create_align_button("По правому краю", AlignmentType.RIGHT)
+        create_align_button("По верхнему краю", AlignmentType.TOP)
+        create_align_button("По нижнему краю", AlignmentType.BOTTOM)
+        create_align_button("По центру горизонтально", AlignmentType.CENTER_H)
+        create_align_button("По центру вертикально", AlignmentType.CENTER_V)
+        create_align_button("По центру", AlignmentType.CENTER)
+        create_align_button("Распределить горизонтально", AlignmentType.DISTRIBUTE_H)
+        create_align_button("Распределить вертикально", AlignmentType.DISTRIBUTE_V)
+
+        layout.addWidget(align_buttons)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Cancel)
+        buttons.rejected.connect(dialog.reject)
+        layout.addWidget(buttons)
+
+        dialog.align_result = None
+        if dialog.exec() and hasattr(dialog, 'align_result') and dialog.align_result:
+            self.align_elements(self.selected_elements, dialog.align_result)
+
+    def align_elements(self, elements: List[CanvasElement], align_type: AlignmentType):
+        """Выравнивает элементы"""
+        if len(elements) < 2:
+            return
+
+        # Геометрия всего выделения одним массивом: min/max/mean идут в C
+        arr = np.array([(e.position.x(), e.position.y(), e.size.width(), e.size.height())
+                        for e in elements], dtype=np.float64)
+        xs, ys, ws, hs = arr[:, 0], arr[:, 1], arr[:, 2], arr[:, 3]
+        count = len(elements)
+
+        new_xs = new_ys = None
+        if align_type == AlignmentType.LEFT:
+            new_xs = np.full(count, xs.min())
+        elif align_type == AlignmentType.RIGHT:
+            new_xs = (xs + ws).max() - ws
+        elif align_type == AlignmentType.TOP:
+            new_ys = np.full(count, ys.min())
+        elif align_type == AlignmentType.BOTTOM:
+            new_ys = (ys + hs).max() - hs
+        elif align_type == AlignmentType.CENTER_H:
+            new_xs = (xs + ws * 0.5).mean() - ws * 0.5
+        elif align_type == AlignmentType.CENTER_V:
+            new_ys = (ys + hs * 0.5).mean() - hs * 0.5
+        elif align_type == AlignmentType.CENTER:
+            new_xs = (xs + ws * 0.5).mean() - ws * 0.5
+            new_ys = (ys + hs * 0.5).mean() - hs * 0.5
+        elif align_type == AlignmentType.DISTRIBUTE_H:
+            if count > 2:
+                # Порядок и целевые позиции считаются целиком в NumPy:
+                # argsort + linspace вместо питоновской сортировки и шага в цикле
+                order = np.argsort(xs, kind='stable')
+                targets = np.linspace(xs.min(), xs.max(), count)
+                new_xs = xs.copy()
+                new_xs[order] = targets
+        elif align_type == AlignmentType.DISTRIBUTE_V:
+            if count > 2:
+                order = np.argsort(ys, kind='stable')
+                targets = np.linspace(ys.min(), ys.max(), count)
+                new_ys = ys.copy()
+                new_ys[order] = targets
+
+        if new_xs is not None or new_ys is not None:
+            if new_xs is None:
+                new_xs = xs
+            if new_ys is None:
+                new_ys = ys
+            for element, nx, ny in zip(elements, new_xs, new_ys):
+                element.position = QPointF(float(nx), float(ny))
+
+        self._mark_dirty()
+
+    def create_link_dialog(self, element: CanvasElement):
+        """Создает диалог для создания ссылки"""
+        # Это будет реализовано в MainWindow, так как нужен доступ к списку холстов
+        # Временная реализация - элемент уже должен быть выбран
+        pass
+
+    def _paint_scene(self, painter: QPainter, exclude: Optional[set] = None):
+        """Рисует фон, сетку и зафиксированные элементы.
+
+        Элементы из exclude пропускаются — так во время перетаскивания
+        статичная часть сцены рисуется без движущихся элементов.
+        """
+        # Фон и сетка рисуются один раз в QPixmap и дальше просто блитятся
+        w, h = self.width(), self.height()
+        ratio = self.devicePixelRatioF()
+        if self._grid_pixmap is None or self._grid_key != (w, h, ratio):
+            pixmap = QPixmap(int(w * ratio), int(h * ratio))
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(QColor(255, 255, 255))
+            grid_painter = QPainter(pixmap)
+            grid_painter.setPen(QPen(QColor(240, 240, 240)))
+            grid_size = 20
+            grid_painter.drawLines(
+                [QLineF(x, 0, x, h) for x in range(0, w, grid_size)] +
+                [QLineF(0, y, w, y) for y in range(0, h, grid_size)])
+            grid_painter.end()
+            self._grid_pixmap = pixmap
+            self._grid_key = (w, h, ratio)
+        painter.drawPixmap(0, 0, self._grid_pixmap)
+
+        # Рисование элементов. Идущие подряд (по z) прямые и прямоугольники
+        # одного цвета отправляются одним вызовом drawLines/drawRects,
+        # перо переустанавливается только при смене цвета
+        if self._sorted_cache is None:
+            self._sorted_cache = sorted(self.elements, key=attrgetter('z_value'))
+        sorted_elements = self._sorted_cache if exclude is None else [
+            e for e in self._sorted_cache if e not in exclude]
+        i = 0
+        n = len(sorted_elements)
+        pen_rgba = None
+        while i < n:
+            element = sorted_elements[i]
+            et = element.element_type
+            if et == ElementType.STRAIGHT:
+                rgba = element.color.rgba()
+                lines = []
+                while (i < n and sorted_elements[i].element_type == ElementType.STRAIGHT
+                       and sorted_elements[i].color.rgba() == rgba):
+                    e = sorted_elements[i]
+                    end = e.data.get('end', e.position)
+                    end_point = QPointF(end[0], end[1]) if isinstance(end, tuple) else end
+                    lines.append(QLineF(e.position, end_point))
+                    i += 1
+                if rgba != pen_rgba:
+                    painter.setPen(_pen(rgba, 3))
+                    pen_rgba = rgba
+                painter.drawLines(lines)
+            elif et == ElementType.RECT:
+                rgba = element.color.rgba()
+                rects = []
+                while (i < n and sorted_elements[i].element_type == ElementType.RECT
+                       and sorted_elements[i].color.rgba() == rgba):
+                    rects.append(sorted_elements[i].get_bounds())
+                    i += 1
+                if rgba != pen_rgba:
+                    painter.setPen(_pen(rgba, 3))
+                    pen_rgba = rgba
+                painter.drawRects(rects)
+            else:
+                self.draw_element(painter, element)
+                pen_rgba = None  # draw_element ставит перо самостоятельно
+                i += 1
+
+    def _render_scene_cache(self, exclude: Optional[set] = None) -> QImage:
+        """Отрисовывает зафиксированную сцену в кэш
+
+        Кэш выделяется в физических пикселях экрана: на HiDPI-дисплеях
+        сцена растрируется в полном разрешении, а не масштабируется из 1x.
+        """
+        ratio = self.devicePixelRatioF()
+        image = QImage(int(self.width() * ratio), int(self.height() * ratio),
+                       QImage.Format_ARGB32_Premultiplied)
+        image.setDevicePixelRatio(ratio)
+        cache_painter = QPainter(image)
+        cache_painter.setRenderHint(QPainter.Antialiasing)
+        self._paint_scene(cache_painter, exclude)
+        cache_painter.end()
+        return image
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        # Работаем только в открытой области: кэши блитятся фрагментом,
+        # элементы вне неё пропускаются по скалярному AABB-тесту
+        exposed = event.rect()
+        painter.setClipRect(exposed)
+        ex, ey = float(exposed.left()), float(exposed.top())
+        ex2, ey2 = float(exposed.right() + 1), float(exposed.bottom() + 1)
+        # Сглаживание включается только для зафиксированной сцены:
+        # превью и рамки выделения перерисовываются десятки раз в секунду,
+        # и попиксельное смешивание там не окупается
+        if self.dragging:
+            # Во время перетаскивания двигаются только выделенные элементы:
+            # статичная часть сцены берётся из отдельного кэша, а движущиеся
+            # рисуются поверх напрямую (на время перетаскивания они
+            # оказываются выше остальных по z)
+            ratio = self.devicePixelRatioF()
+            if self._static_cache is None or self._static_cache.devicePixelRatio() != ratio:
+                self._static_cache = self._render_scene_cache(
+                    exclude=set(self.selected_elements))
+            # Блит от начала координат: клип уже ограничивает работу открытой
+            # областью, а Qt сам учитывает devicePixelRatio кэша
+            painter.drawImage(QPointF(0, 0), self._static_cache)
+            painter.setRenderHint(QPainter.Antialiasing)
+            # Запас на перо (3px) со сглаживанием поверх геометрических границ
+            stroke = 4.0
+            for element in self.selected_elements:
+                if element.intersects_rect(ex - stroke, ey - stroke,
+                                           ex2 + stroke, ey2 + stroke):
+                    self.draw_element(painter, element)
+            painter.setRenderHint(QPainter.Antialiasing, False)
+        else:
+            if self._scene_cache is None or self._scene_cache.devicePixelRatio() != self.devicePixelRatioF():
+                self._scene_cache = self._render_scene_cache()
+            painter.drawImage(QPointF(0, 0), self._scene_cache)
+
+        # Рисование текущего элемента
+        if self.drawing:
+            self._draw_preview(painter)
+
+        # Рисование прямоугольника выделения
+        if self.selection_rect:
+            painter.setPen(_pen(_COLOR_ACCENT, 2, Qt.DashLine))
+            painter.setBrush(_brush(_COLOR_MARQUEE_FILL))
+            painter.drawRect(self.selection_rect)
+
+        # Рисование маркеров выделения: все маркеры всех выделенных
+        # элементов собираются в один QPainterPath и рисуются одним вызовом
+        if self.selected_elements:
+            handles_path = QPainterPath()
+            pad = 8.0  # маркеры выступают за границы элемента
+            for element in self.selected_elements:
+                if element.intersects_rect(ex - pad, ey - pad, ex2 + pad, ey2 + pad):
+                    self._add_selection_handles(handles_path, element)
+            if not handles_path.isEmpty():
+                painter.setPen(_pen(_COLOR_ACCENT, 2))
+                painter.setBrush(_brush(_COLOR_WHITE))
+                painter.drawPath(handles_path)
+
+    def _update_preview_path(self):
+        """Пересобирает геометрию превью по текущему элементу"""
+        element = self.current_element
+        path = QPainterPath()
+        et = element.element_type
+        if et == ElementType.RECT:
+            path.addRect(QRectF(element.position, element.size))
+        elif et == ElementType.CIRCLE:
+            radius = element.size.width()
+            path.addEllipse(element.position, radius, radius)
+        elif et in (ElementType.TRIANGLE, ElementType.PENTAGON, ElementType.HEXAGON):
+            sides = {ElementType.TRIANGLE: 3, ElementType.PENTAGON: 5, ElementType.HEXAGON: 6}[et]
+            center = element.position + QPointF(element.size.width() / 2, element.size.height() / 2)
+            path.addPolygon(QPolygonF(self.regular_polygon(center, element.size.width(), sides)))
+            path.closeSubpath()
+        elif et in (ElementType.STRAIGHT, ElementType.ARROW):
+            end = element.data.get('end', element.position)
+            path.moveTo(element.position)
+            path.lineTo(end)
+            if et == ElementType.ARROW:
+                h1, h2 = self.arrow_head(element.position, end)
+                path.moveTo(end)
+                path.lineTo(h1)
+                path.moveTo(end)
+                path.lineTo(h2)
+        self._preview_path = path
+
+    def _draw_preview(self, painter: QPainter):
+        """Рисует только создаваемый сейчас элемент"""
+        if self.current_element is not None:
+            if self._preview_path.isEmpty():
+                # До первого движения мыши геометрии ещё нет
+                self.draw_element(painter, self.current_element)
+            else:
+                painter.setPen(_pen(self.current_element.color.rgba(), 3))
+                painter.setBrush(Qt.NoBrush)
+                painter.drawPath(self._preview_path)
+        elif self._stroke_n > 1:
+            # Текущая кривая: current_element для неё не создаётся
+            painter.setPen(_pen(_COLOR_DEFAULT, 3))
+            painter.setBrush(Qt.NoBrush)
+            painter.drawPath(self._stroke_path)
+
+    def draw_element(self, painter: QPainter, element: CanvasElement):
+        """Рисует элемент на холсте"""
+        painter.setPen(_pen(element.color.rgba(), 3))
+        handler = self._DRAW_DISPATCH.get(element.element_type)
+        if handler:
+            handler(self, painter, element)
+
+    def _draw_point(self, painter: QPainter, element: CanvasElement):
+        radius = element.data.get('radius', 5)
+        painter.drawEllipse(element.position, radius, radius)
+
+    def _draw_line(self, painter: QPainter, element: CanvasElement):
+        points = element.data.get('points', [])
+        if len(points) > 1:
+            # QPolygonF кривой строится один раз: список точек после
+            # создания/загрузки не мутируется, только заменяется целиком
+            key = (id(points), len(points))
+            if element._polygon_key != key:
+                element._cached_polygon = QPolygonF([QPointF(x, y) for x, y in points])
+                element._polygon_key = key
+            # Один вызов Qt на всю кривую вместо вызова на каждый сегмент
+            painter.drawPolyline(element._cached_polygon)
+
+    def _draw_straight(self, painter: QPainter, element: CanvasElement):
+        end = element.data.get('end', element.position)
+        painter.drawLine(element.position, QPointF(end[0], end[1]) if isinstance(end, tuple) else end)
+
+    def _draw_triangle(self, painter: QPainter, element: CanvasElement):
+        size = element.size.width()
+        center = element.position + QPointF(size / 2, size / 2)
+        painter.drawPolygon(self._shape_polygon(element, center, size, 3))
+
+    def _draw_rect(self, painter: QPainter, element: CanvasElement):
+        painter.drawRect(QRectF(element.position, element.size))
+
+    def _draw_circle(self, painter: QPainter, element: CanvasElement):
+        size = element.size.width()
+        painter.drawEllipse(element.position, size, size)
+
+    def _draw_pentagon(self, painter: QPainter, element: CanvasElement):
+        center = element.position + QPointF(element.size.width() / 2, element.size.height() / 2)
+        painter.drawPolygon(self._shape_polygon(element, center, element.size.width(), 5))
+
+    def _draw_hexagon(self, painter: QPainter, element: CanvasElement):
+        center = element.position + QPointF(element.size.width() / 2, element.size.height() / 2)
+        painter.drawPolygon(self._shape_polygon(element, center, element.size.width(), 6))
+
+    def _draw_arrow(self, painter: QPainter, element: CanvasElement):
+        end = element.data.get('end', element.position)
+        end_point = QPointF(end[0], end[1]) if isinstance(end, tuple) else end
+        # Наконечник считается и упаковывается в две полилинии один раз,
+        # пока геометрия стрелки не изменится
+        key = (element.position.x(), element.position.y(), end_point.x(), end_point.y())
+        if element._polygon_key != key:
+            h1, h2 = self.arrow_head(element.position, end_point)
+            element._cached_polygon = (QPolygonF([h1, end_point, element.position]),
+                                       QPolygonF([end_point, h2]))
+            element._polygon_key = key
+        shaft, wing = element._cached_polygon
+        painter.drawPolyline(shaft)
+        painter.drawPolyline(wing)
+
+    def _draw_text(self, painter: QPainter, element: CanvasElement):
+        painter.setFont(_font(element.data.get('font_family', 'Arial'),
+                              element.data.get('font_size', 12)))
+        painter.setPen(_pen(QColor(element.data.get('color', '#000000')).rgba(), 3))
+
+        text = element.data.get('text', '')
+        alignment = element.data.get('alignment', Qt.AlignLeft)
+
+        rect = QRectF(element.position, element.size)
+        flags = alignment | Qt.AlignTop | Qt.TextWordWrap
+
+        painter.drawText(rect, flags, text)
+        # Рисуем рамку текстового блока
+        painter.setPen(_pen(_COLOR_FRAME, 3))
+        painter.drawRect(rect)
+
+    def _draw_image(self, painter: QPainter, element: CanvasElement):
+        image_path = element.data.get('image_path', '')
+        # stat-вызов выполняется один раз на путь, а не на каждый кадр
+        if element._path_checked != image_path:
+            element._path_valid = bool(image_path) and os.path.exists(image_path)
+            element._path_checked = image_path
+        if element._path_valid:
+            # Декодирование и масштабирование выполняются один раз,
+            # дальше готовый pixmap живёт на элементе до смены размера
+            size = element.size.toSize()
+            key = (image_path, size.width(), size.height())
+            if element._pixmap_key != key:
+                source = _load_pixmap(image_path, os.path.getmtime(image_path))
+                element._cached_pixmap = source.scaled(
+                    size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                element._pixmap_key = key
+            painter.drawPixmap(element.position.toPoint(), element._cached_pixmap)
+        else:
+            # Рисуем заглушку
+            rect = QRectF(element.position, element.size)
+            painter.setPen(_pen(_COLOR_FRAME, 3))
+            painter.drawRect(rect)
+            painter.drawText(rect, Qt.AlignCenter, "Изображение")
+
+    def _draw_link(self, painter: QPainter, element: CanvasElement):
+        # Рисуем ссылку как специальную иконку
+        rect = QRectF(element.position, element.size)
+        painter.setPen(_pen(_COLOR_ACCENT, 3))
+        painter.setBrush(_brush(_COLOR_ACCENT_FILL))
+        painter.drawRect(rect)
+        painter.drawText(rect, Qt.AlignCenter, "→")
+
+    # Диспетчеризация отрисовки по типу элемента вместо цепочки elif
+    _DRAW_DISPATCH = {
+        ElementType.POINT: _draw_point,
+        ElementType.LINE: _draw_line,
+        ElementType.STRAIGHT: _draw_straight,
+        ElementType.TRIANGLE: _draw_triangle,
+        ElementType.RECT: _draw_rect,
+        ElementType.CIRCLE: _draw_circle,
+        ElementType.PENTAGON: _draw_pentagon,
+        ElementType.HEXAGON: _draw_hexagon,
+        ElementType.ARROW: _draw_arrow,
+        ElementType.TEXT: _draw_text,
+        ElementType.IMAGE: _draw_image,
+        ElementType.LINK: _draw_link,
+    }
+
+    def _shape_polygon(self, element: CanvasElement, center: QPointF, size: float, sides: int) -> QPolygonF:
+        """Возвращает кэшированный QPolygonF фигуры, пересобирая его при смене геометрии"""
+        key = (center.x(), center.y(), size, sides)
+        if element._polygon_key != key:
+            element._cached_polygon = QPolygonF(self.regular_polygon(center, size, sides))
+            element._polygon_key = key
+        return element._cached_polygon
+
+    def _add_selection_handles(self, path: QPainterPath, element: CanvasElement):
+        """Добавляет маркеры выделения элемента в общий QPainterPath"""
+        bounds = element.get_bounds()
+        left, top = bounds.left(), bounds.top()
+        right, bottom = bounds.right(), bounds.bottom()
+        cx, cy = bounds.center().x(), bounds.center().y()
+        for x, y in ((left, top), (cx, top), (right, top), (right, cy),
+                     (right, bottom), (cx, bottom), (left, bottom), (left, cy)):
+            path.addEllipse(QPointF(x, y), 4, 4)
+
+    def resizeEvent(self, event):
+        """Пересобирает кэш сцены под новый размер холста"""
+        self._scene_cache = None
+        self._static_cache = None
+        super().resizeEvent(event)
+
+    def keyPressEvent(self, event):
+        """Обработка нажатий клавиш"""
+        if event.key() == Qt.Key_Delete and self.selected_elements:
+            for element in self.selected_elements.copy():
+                self.remove_element(element)
+        elif event.key() == Qt.Key_Escape:
+            self.clear_selection()
+        super().keyPressEvent(event)
+
+    def load_image(self, image_path: str) -> Optional[CanvasElement]:
+        """Загружает изображение на холст"""
+        if not os.path.exists(image_path):
+            return None
+
+        pixmap = _load_pixmap(image_path, os.path.getmtime(image_path))
+        element = CanvasElement(ElementType.IMAGE, QPointF(50, 50))
+        element.size = QSizeF(pixmap.width(), pixmap.height())
+        element.data = {'image_path': image_path}
+        self.add_element(element)
+        return element
+
+
+class MainWindow(QMainWindow):
+    """Главное окно приложения"""
+
+    def __init__(self):
+        super().__init__()
+
+        self.setWindowTitle("Графический редактор интерфейсов")
+        self.setGeometry(100, 100, 1200, 800)
+
+        self.current_tool = "select"
+        # Реестр кнопок инструментов: tool_id -> QAction
+        self._tool_actions: Dict[str, QAction] = {}
+        self.canvases: Dict[str, Canvas] = {}
+        self.current_canvas_id = "canvas_1"
+        self.canvas_counter = 1
+        # Индексы canvas_id -> номер вкладки / строка списка, чтобы
+        # не сканировать виджеты при каждом переключении
+        self._id_to_tab_index: Dict[str, int] = {}
+        self._id_to_list_row: Dict[str, int] = {}
+
+        self.setup_ui()
+        self.setup_menu()
+
+        # Создаем первый холст (после инициализации tab_widget и списка холстов)
+        self.create_canvas("Холст 1")
+
+        # Обработка кликов по ссылкам на холсте
+        for canvas in self.canvases.values():
+            # Подключаем обработчик через переопределение mousePressEvent в Canvas
+            pass
+
+    def setup_ui(self):
+        """Настройка интерфейса"""
+        # Центральный виджет с вкладками
+        self.tab_widget = QTabWidget()
+        self.tab_widget.setTabsClosable(True)
+        self.tab_widget.tabCloseRequested.connect(self.close_canvas_tab)
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
+        self.setCentralWidget(self.tab_widget)
+
+        # Панель инструментов
+        toolbar = QToolBar("Инструменты")
+        toolbar.setMovable(False)
+        self.addToolBar(Qt.LeftToolBarArea, toolbar)
+
+        # Группы инструментов
+        self.add_tool_button(toolbar, "Выделение", "select", True)
+        toolbar.addSeparator()
+
+        self.add_tool_button(toolbar, "Точка", "point")
+        self.add_tool_button(toolbar, "Кривая", "line")
+        self.add_tool_button(toolbar, "Прямая", "straight")
+        self.add_tool_button(toolbar, "Стрелка", "arrow")
+        toolbar.addSeparator()
+
+        self.add_tool_button(toolbar, "Прямоугольник", "rect")
+        self.add_tool_button(toolbar, "Круг", "circle")
+        self.add_tool_button(toolbar, "Треугольник", "triangle")
+        self.add_tool_button(toolbar, "Пятиугольник", "pentagon")
+        self.add_tool_button(toolbar, "Шестиугольник", "hexagon")
+        toolbar.addSeparator()
+
+        self.add_tool_button(toolbar, "Текст", "text")
+        toolbar.addSeparator()
+
+        self.add_tool_button(toolbar, "Изображение", "image")
+        self.add_tool_button(toolbar, "Ссылка", "link")
+
+        # Панель выравнивания
+        align_toolbar = QToolBar("Выравнивание")
+        self.addToolBar(Qt.RightToolBarArea, align_toolbar)
+
+        align_btn = QPushButton("Выровнять")
+        align_btn.clicked.connect(self.show_alignment_dialog)
+        align_toolbar.addWidget(align_btn)
+
+        # Список холстов
+        self.canvas_list = QListWidget()
+        self.canvas_list.setMaximumWidth(200)
+        self.canvas_list.itemClicked.connect(self.switch_canvas)
+
+        dock = self.create_dock_widget("Холсты", self.canvas_list)
+        self.addDockWidget(Qt.LeftDockWidgetArea, dock)
+
+    def setup_menu(self):
+        """Настройка меню"""
+        menubar = self.menuBar()
+
+        # Файл
+        file_menu = menubar.addMenu("Файл")
+        file_menu.addAction("Новый холст", self.create_new_canvas, QKeySequence.New)
+        file_menu.addAction("Открыть проект", self.open_project, QKeySequence.Open)
+        file_menu.addAction("Сохранить проект", self.save_project, QKeySequence.Save)
+        file_menu.addSeparator()
+        file_menu.addAction("Выход", self.close, QKeySequence.Quit)
+
+        # Правка
+        edit_menu = menubar.addMenu("Правка")
+        edit_menu.addAction("Удалить", lambda: self.get_current_canvas().keyPressEvent(
+            type('obj', (object,), {'key': lambda _self: Qt.Key_Delete})()), QKeySequence.Delete)
+
+        # Вид
+        view_menu = menubar.addMenu("Вид")
+        view_menu.addAction("Список холстов", self.toggle_canvas_list)
+
+    def create_dock_widget(self, title: str, widget: QWidget):
+        """Создает dock виджет"""
+        dock = QDockWidget(title, self)
+        dock.setWidget(widget)
+        return dock
+
+    def add_tool_button(self, toolbar: QToolBar, name: str, tool_id: str, checked: bool = False):
+        """Добавляет кнопку инструмента"""
+        action = QAction(name, self)
+        action.setCheckable(True)
+        action.setChecked(checked and tool_id == self.current_tool)
+        action.setData(tool_id)
+        action.triggered.connect(lambda checked, t=tool_id: self.select_tool(t))
+        toolbar.addAction(action)
+        self._tool_actions[tool_id] = action
+
+        # Подсказка
+        tooltips = {
+            "select": "Выделение элементов",
+            "point": "Точка",
+            "line": "Кривая линия",
+            "straight": "Прямая линия",
+            "arrow": "Стрелка",
+            "rect": "Прямоугольник",
+            "circle": "Круг",
+            "triangle": "Треугольник",
+            "pentagon": "Пятиугольник",
+            "hexagon": "Шестиугольник",
+            "text": "Текст",
+            "image": "Изображение",
+            "link": "Ссылка на другой холст"
+        }
+        action.setToolTip(tooltips.get(tool_id, name))
+
+    def select_tool(self, tool_id: str):
+        """Выбирает инструмент"""
+        self.current_tool = tool_id
+
+        # Обновляем состояние кнопок по реестру, без обхода дерева виджетов
+        for tid, action in self._tool_actions.items():
+            action.setChecked(tid == tool_id)
+
+        # Если выбран инструмент изображения, открываем диалог
+        if tool_id == "image":
+            self.load_image_dialog()
+        elif tool_id == "link":
+            # Для ссылки нужно сначала выбрать элемент
+            canvas = self.get_current_canvas()
+            if canvas and canvas.selected_elements:
+                self.create_link_dialog()
+            else:
+                QMessageBox.information(self, "Информация",
+                                        "Выберите элемент, затем используйте инструмент 'Ссылка' или контекстное меню")
+                self.select_tool("select")
+
+    def get_current_tool(self):
+        """Возвращает текущий инструмент"""
+        return self.current_tool
+
+    def get_current_canvas(self) -> Optional[Canvas]:
+        """Возвращает текущий холст"""
+        return self.canvases.get(self.current_canvas_id)
+
+    def create_canvas(self, name: str) -> str:
+        """Создает новый холст"""
+        canvas_id = f"canvas_{self.canvas_counter}"
+        self.canvas_counter += 1
+
+        canvas = Canvas(canvas_id, self.get_current_tool)
+        self.canvases[canvas_id] = canvas
+
+        # Добавляем вкладку
+        index = self.tab_widget.addTab(canvas, name)
+        self.tab_widget.setCurrentIndex(index)
+        self._id_to_tab_index[canvas_id] = index
+
+        # Добавляем в список
+        item = QListWidgetItem(name)
+        item.setData(Qt.UserRole, canvas_id)
+        self.canvas_list.addItem(item)
+        self._id_to_list_row[canvas_id] = self.canvas_list.count() - 1
+
+        self.current_canvas_id = canvas_id
+        return canvas_id
+
+    def create_new_canvas(self):
+        """Создает новый холст через меню"""
+        name = f"Холст {self.canvas_counter}"
+        self.create_canvas(name)
+
+    def close_canvas_tab(self, index: int):
+        """Закрывает вкладку холста"""
+        widget = self.tab_widget.widget(index)
+        if widget:
+            canvas_id = widget.canvas_id
+            # Удаляем из словаря
+            if canvas_id in self.canvases:
+                del self.canvases[canvas_id]
+            # Удаляем из списка
+            row = self._id_to_list_row.get(canvas_id)
+            if row is not None:
+                self.canvas_list.takeItem(row)
+            # Удаляем вкладку
+            self.tab_widget.removeTab(index)
+            # Индексы после закрытой вкладки сдвинулись — пересобираем
+            self._rebuild_canvas_indices()
+
+            # Переключаемся на другой холст, если есть
+            if self.tab_widget.count() > 0:
+                self.tab_widget.setCurrentIndex(0)
+                widget = self.tab_widget.currentWidget()
+                if widget:
+                    self.current_canvas_id = widget.canvas_id
+
+    def _rebuild_canvas_indices(self):
+        """Пересобирает индексы canvas_id -> вкладка/строка списка"""
+        self._id_to_tab_index = {
+            self.tab_widget.widget(i).canvas_id: i
+            for i in range(self.tab_widget.count())
+        }
+        self._id_to_list_row = {
+            self.canvas_list.item(i).data(Qt.UserRole): i
+            for i in range(self.canvas_list.count())
+        }
+
+    def on_tab_changed(self, index: int):
+        """Обработка смены вкладки"""
+        widget = self.tab_widget.widget(index)
+        if widget:
+            self.current_canvas_id = widget.canvas_id
+
+    def switch_canvas(self, item: QListWidgetItem):
+        """Переключается на холст из списка"""
+        canvas_id = item.data(Qt.UserRole)
+        if canvas_id in self.canvases:
+            index = self._id_to_tab_index.get(canvas_id, -1)
+            if index >= 0:
+                self.tab_widget.setCurrentIndex(index)
+                self.current_canvas_id = canvas_id
+
+    def load_image_dialog(self):
+        """Диалог загрузки изображения"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Выберите изображение", "", "Images (*.png *.jpg *.jpeg *.bmp *.gif)"
+        )
+        if file_path:
+            canvas = self.get_current_canvas()
+            if canvas:
+                canvas.load_image(file_path)
+                # Возвращаемся к инструменту выделения
+                self.select_tool("select")
+
+    def create_link_dialog(self, element: Optional[CanvasElement] = None):
+        """Создает диалог для создания ссылки на другой холст"""
+        canvas = self.get_current_canvas()
+        if not canvas:
+            return
+
+        # Если элемент не передан, используем выделенные
+        if not element:
+            if not canvas.selected_elements:
+                QMessageBox.information(self, "Информация", "Выберите элемент для создания ссылки")
+                self.select_tool("select")
+                return
+            elements_to_link = canvas.selected_elements
+        else:
+            elements_to_link = [element]
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Создание ссылки")
+        layout = QVBoxLayout(dialog)
+
+        layout.addWidget(QLabel("Выберите целевой холст:"))
+
+        canvas_list = QListWidget()
+        for canvas_id, canvas_obj in self.canvases.items():
+            if canvas_id != self.current_canvas_id:
+                item = QListWidgetItem(f"Холст {canvas_id.split('_')[1]}")
+                item.setData(Qt.UserRole, canvas_id)
+                canvas_list.addItem(item)
+
+        layout.addWidget(canvas_list)
+
+        # Анимация
+        animate_check = QCheckBox("Анимированный переход")
+        animate_check.setChecked(True)
+        layout.addWidget(animate_check)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        layout.addWidget(buttons)
+
+        if dialog.exec() and canvas_list.currentItem():
+            target_canvas_id = canvas_list.currentItem().data(Qt.UserRole)
+            animate = animate_check.isChecked()
+
+            # Создаем ссылку для каждого элемента
+            for element in elements_to_link:
+                element.element_type = ElementType.LINK
+                element.data['target_canvas'] = target_canvas_id
+                element.data['animate'] = animate
+                element.size = QSizeF(30, 30)
+
+            canvas._mark_dirty()
+            self.select_tool("select")
+        else:
+            self.select_tool("select")
+
+    def create_link_for_element(self, element: CanvasElement):
+        """Создает ссылку для конкретного элемента (вызывается из контекстного меню)"""
+        self.create_link_dialog(element)
+
+    def show_alignment_dialog(self):
+        """Показывает диалог выравнивания"""
+        canvas = self.get_current_canvas()
+        if canvas:
+            canvas.show_alignment_dialog()
+
+    def toggle_canvas_list(self):
+        """Переключает видимость списка холстов"""
+        # Реализация переключения видимости dock виджета
+        pass
+
+    def navigate_to_canvas(self, target_canvas_id: str, animate: bool = True):
+        """Переходит на указанный холст с анимацией"""
+        if target_canvas_id not in self.canvases:
+            return
+
+        current_index = self.tab_widget.currentIndex()
+        target_index = self._id_to_tab_index.get(target_canvas_id, -1)
+        if target_index == -1:
+            return
+
+        if animate and abs(target_index - current_index) > 0:
+            # Анимация перехода
+            self.animate_tab_transition(current_index, target_index)
+        else:
+            self.tab_widget.setCurrentIndex(target_index)
+            self.current_canvas_id = target_canvas_id
+
+    def animate_tab_transition(self, from_index: int, to_index: int):
+        """Анимирует переход между вкладками"""
+        # Одна нативная анимация Qt вместо цепочки из QTimer.singleShot
+        # с питоновскими замыканиями на каждый шаг
+        animation = QVariantAnimation(self)
+        animation.setStartValue(float(from_index))
+        animation.setEndValue(float(to_index))
+        animation.setDuration(200)
+        animation.setEasingCurve(QEasingCurve.OutCubic)
+
+        def apply_value(value):
+            index = int(round(value))
+            if 0 <= index < self.tab_widget.count():
+                self.tab_widget.setCurrentIndex(index)
+
+        def finish():
+            # Финальное переключение
+            self.tab_widget.setCurrentIndex(to_index)
+            widget = self.tab_widget.currentWidget()
+            if widget:
+                self.current_canvas_id = widget.canvas_id
+
+        animation.valueChanged.connect(apply_value)
+        animation.finished.connect(finish)
+        animation.start(QVariantAnimation.DeleteWhenStopped)
+
+    def save_project(self):
+        """Сохраняет проект"""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Сохранить проект", "", "JSON Files (*.json)"
+        )
+        if not file_path:
+            return
+
+        try:
+            self._write_project(file_path)
+            QMessageBox.information(self, "Успех", "Проект сохранен")
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить проект: {str(e)}")
+
+    def _write_project(self, file_path: str):
+        """Пишет проект в файл, сериализуя элементы по одному
+
+        Полная структура проекта не материализуется в памяти: каркас JSON
+        пишется вручную, а каждый элемент кодируется и уходит на диск
+        отдельно (через orjson, если он установлен).
+        """
+        if orjson is not None:
+            encode = orjson.dumps
+        else:
+            def encode(obj):
+                # Компактная форма без отступов: файл меньше,
+                # и не работает питоновский pretty-printer
+                return json.dumps(obj, ensure_ascii=False,
+                                  separators=(',', ':')).encode('utf-8')
+
+        with open(file_path, 'wb') as f:
+            f.write(b'{"canvases":{')
+            first_canvas = True
+            for canvas_id, canvas in self.canvases.items():
+                if not first_canvas:
+                    f.write(b',')
+                first_canvas = False
+                name = self.tab_widget.tabText(self.tab_widget.indexOf(canvas))
+                f.write(encode(canvas_id) + b':{"elements":[')
+                first_element = True
+                for element in canvas.elements:
+                    if not first_element:
+                        f.write(b',')
+                    first_element = False
+                    f.write(encode(element.to_dict()))
+                f.write(b'],"name":' + encode(name) + b'}')
+            f.write(b'},"current_canvas":' + encode(self.current_canvas_id) + b'}')
+
+    def open_project(self):
+        """Открывает проект"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Открыть проект", "", "JSON Files (*.json)"
+        )
+        if not file_path:
+            return
+
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                project_data = json.load(f)
+
+            # Очищаем текущие холсты
+            while self.tab_widget.count() > 0:
+                self.tab_widget.removeTab(0)
+            self.canvases.clear()
+            self.canvas_list.clear()
+
+            # Загружаем холсты
+            for canvas_id, canvas_data in project_data.get('canvases', {}).items():
+                name = canvas_data.get('name', canvas_id)
+                canvas = Canvas(canvas_id, self.get_current_tool)
+
+                # Загружаем элементы
+                for elem_data in canvas_data.get('elements', []):
+                    element = CanvasElement.from_dict(elem_data)
+                    canvas.add_element(element)
+
+                self.canvases[canvas_id] = canvas
+                index = self.tab_widget.addTab(canvas, name)
+                item = QListWidgetItem(name)
+                item.setData(Qt.UserRole, canvas_id)
+                self.canvas_list.addItem(item)
+
+            self._rebuild_canvas_indices()
+
+            # Переключаемся на сохраненный холст
+            current_id = project_data.get('current_canvas')
+            if current_id and current_id in self.canvases:
+                index = self._id_to_tab_index.get(current_id, -1)
+                if index >= 0:
+                    self.tab_widget.setCurrentIndex(index)
+                    self.current_canvas_id = current_id
+
+            QMessageBox.information(self, "Успех", "Проект загружен")
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить проект: {str(e)}")
+
+    def mouseDoubleClickEvent(self, event):
+        """Обработка двойного клика для редактирования элементов"""
+        canvas = self.get_current_canvas()
+        if canvas:
+            pos = event.position()
+            element = canvas.get_element_at(pos)
+            if element:
+                canvas.edit_element(element)
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = MainWindow()
+    window.show()
+    sys.exit(app.exec())
+